@@ -263,21 +263,16 @@ async def delete_style_example(
     """
     Delete a style example (admin only)
     """
-    # Check if example exists
-    example = await prisma.styleexample.find_first(
+    # Delete example in a single statement, the count tells us whether it existed
+    deleted_count = await prisma.styleexample.delete_many(
         where={
             "id": str(example_id),
             "creatorId": str(creator_id)
         }
     )
     
-    if not example:
+    if not deleted_count:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Example not found"
-        )
-    
-    # Delete example
-    await prisma.styleexample.delete(
-        where={"id": str(example_id)}
-    )
\ No newline at end of file
+        )
\ No newline at end of file
@@ -1,9 +1,10 @@
 # File: app/api/dependencies.py (updated)
 # Path: fanfix-api/app/api/dependencies.py
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from app.auth.users import current_active_user, get_prisma
 from app.auth.models import User
+from app.services.vector_service import VectorService
 from prisma import Prisma
 from typing import Dict, Any
 
@@ -68,4 +69,12 @@ async def require_creator_manager(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Insufficient permissions to manage creators"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+# Vector service backed by the app-wide connection pool
+def get_vector_service(request: Request) -> VectorService:
+    """
+    Provides a VectorService that reuses the pool opened in the app lifespan.
+    Falls back to a dedicated pool if the lifespan could not create one.
+    """
+    return VectorService(pool=getattr(request.app.state, "db_pool", None))
@@ -2,13 +2,14 @@
 # Path: fanfix-api/app/api/suggestions.py
 
 from typing import Any, Dict, List
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Response
 import uuid
 
 from prisma import Prisma
 from app.auth.models import User
 from app.auth.users import current_active_user, get_prisma
-from app.api.dependencies import require_api_key
+from app.api.dependencies import get_vector_service, require_api_key
 from app.models.suggestion import (
     SuggestionRequest,
     SuggestionResponse,
@@ -23,9 +24,11 @@ router = APIRouter(prefix="/suggestions", tags=["suggestions"])
 @router.post("/", response_model=SuggestionResponse)
 async def get_suggestions(
     request: SuggestionRequest,
+    background_tasks: BackgroundTasks,
     user_prefs = Depends(require_api_key),  # This dependency checks for API key
     current_user: User = Depends(current_active_user),
-    prisma: Prisma = Depends(get_prisma)
+    prisma: Prisma = Depends(get_prisma),
+    vector_service: VectorService = Depends(get_vector_service)
 ) -> Any:
     """
     Get message suggestions for a fan message
@@ -35,21 +38,24 @@ async def get_suggestions(
         api_key=user_prefs.openaiApiKey,
         model_name=user_prefs.modelName or "gpt-3.5-turbo"
     )
-    vector_service = VectorService()
     
     # Get creator style if available
-    creator_style = None
-    creator_id = user_prefs.selectedCreatorId
-    if creator_id:
+    async def get_creator_style():
+        if not creator_id:
+            return None
         creator = await prisma.creator.find_unique(
             where={"id": creator_id},
             include={"style": True}
         )
-        if creator and creator.style:
-            creator_style = creator.style
+        return creator.style if creator else None
     
-    # Get embedding for the fan message
-    embedding = await ai_service.get_embedding(request.message)
+    # Look up the creator style while the fan message is being embedded,
+    # the two calls are independent
+    creator_id = user_prefs.selectedCreatorId
+    creator_style, embedding = await asyncio.gather(
+        get_creator_style(),
+        ai_service.get_embedding(request.message)
+    )
     
     # Find similar conversations
     similar_conversations = []
@@ -76,10 +82,12 @@ async def get_suggestions(
     )
     
     # Store the conversation for future reference (but only if not regenerating)
+    # The insert runs after the response is sent since nothing here depends on it
     if creator_id and suggestions and not request.regenerate:
         first_suggestion = suggestions[0]
         creator_responses = first_suggestion["messages"]
-        await vector_service.store_conversation(
+        background_tasks.add_task(
+            vector_service.store_conversation,
             creator_id=creator_id,
             fan_message=request.message,
             creator_responses=creator_responses,
@@ -92,12 +100,12 @@ async def get_suggestions(
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_suggestion_stats(
     creator_id: uuid.UUID = None,
-    current_user: User = Depends(current_active_user)
+    current_user: User = Depends(current_active_user),
+    vector_service: VectorService = Depends(get_vector_service)
 ) -> Any:
     """
     Get statistics about stored conversations
     """
-    vector_service = VectorService()
     stats = await vector_service.get_conversation_stats(
         creator_id=str(creator_id) if creator_id else None
     )
@@ -106,12 +114,12 @@ async def get_suggestion_stats(
 @router.post("/clear", status_code=status.HTTP_200_OK, response_model=Dict[str, Any])
 async def clear_stored_conversations(
     creator_id: uuid.UUID = None,
-    current_user: User = Depends(current_active_user)
+    current_user: User = Depends(current_active_user),
+    vector_service: VectorService = Depends(get_vector_service)
 ) -> Any:
     """
     Clear stored conversations
     """
-    vector_service = VectorService()
     count = await vector_service.clear_conversations(
         creator_id=str(creator_id) if creator_id else None
     )
@@ -2,12 +2,15 @@
 # Path: fanfix-api/app/auth/db.py
 
 from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union, cast
+import logging
 import uuid
 from fastapi_users.db.base import BaseUserDatabase
 from prisma import Prisma
 from pydantic import EmailStr
 from app.auth.models import UserCreate, UserDB, UserUpdate
 
+logger = logging.getLogger(__name__)
+
 ID = TypeVar("ID", bound=Any)
 UP = TypeVar("UP", bound=Union[Dict[str, Any], UserDB])
 
@@ -33,7 +36,7 @@ class PrismaUserDatabase(BaseUserDatabase[UP, ID]):
                 return self._model_to_dict(user)
             return None
         except Exception as e:
-            print(f"Error getting user: {e}")
+            logger.error(f"Error getting user: {e}")
             return None
 
     async def get_by_email(self, email: str) -> Optional[UP]:
@@ -46,7 +49,7 @@ class PrismaUserDatabase(BaseUserDatabase[UP, ID]):
                 return self._model_to_dict(user)
             return None
         except Exception as e:
-            print(f"Error getting user by email: {e}")
+            logger.error(f"Error getting user by email: {e}")
             return None
 
     async def create(self, create_dict: Dict[str, Any]) -> UP:
@@ -67,7 +70,7 @@ class PrismaUserDatabase(BaseUserDatabase[UP, ID]):
             user = await self.prisma_client.user.create(data=user_data)
             return self._model_to_dict(user)
         except Exception as e:
-            print(f"Error creating user: {e}")
+            logger.error(f"Error creating user: {e}")
             raise
 
     async def update(self, user_id: ID, update_dict: Dict[str, Any]) -> UP:
@@ -93,7 +96,7 @@ class PrismaUserDatabase(BaseUserDatabase[UP, ID]):
             )
             return self._model_to_dict(user)
         except Exception as e:
-            print(f"Error updating user: {e}")
+            logger.error(f"Error updating user: {e}")
             raise
 
     async def delete(self, user_id: ID) -> None:
@@ -103,7 +106,7 @@ class PrismaUserDatabase(BaseUserDatabase[UP, ID]):
                 where={"id": str(user_id)},
             )
         except Exception as e:
-            print(f"Error deleting user: {e}")
+            logger.error(f"Error deleting user: {e}")
             raise
     
     def _model_to_dict(self, model) -> UP:
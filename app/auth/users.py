@@ -3,6 +3,7 @@
 
 from typing import Optional, Union, AsyncGenerator, Dict, Any
 from contextlib import asynccontextmanager
+import logging
 
 from fastapi import Depends, Request
 from fastapi_users import FastAPIUsers
@@ -21,6 +22,8 @@ from prisma import Prisma
 from app.core.config import settings
 from app.auth.models import User, UserCreate, UserDB, UserUpdate
 
+logger = logging.getLogger(__name__)
+
 # Prisma client management
 @asynccontextmanager
 async def get_prisma_client() -> AsyncGenerator[Prisma, None]:
@@ -41,7 +44,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[UserCreate, UserDB]):
     verification_token_secret = settings.SECRET_KEY
 
     async def on_after_register(self, user: UserDB, request: Optional[Request] = None):
-        print(f"User {user.id} has registered.")
+        logger.info(f"User {user.id} has registered.")
         
         # Create default user preferences
         async with get_prisma_client() as prisma:
@@ -54,27 +57,28 @@ class UserManager(UUIDIDMixin, BaseUserManager[UserCreate, UserDB]):
                     }
                 )
             except Exception as e:
-                print(f"Error creating user preferences: {e}")
+                logger.error(f"Error creating user preferences: {e}")
 
     async def on_after_forgot_password(
         self, user: UserDB, token: str, request: Optional[Request] = None
     ):
-        print(f"User {user.id} has forgotten their password. Reset token: {token}")
+        logger.info(f"User {user.id} has requested a password reset.")
 
     async def on_after_request_verify(
         self, user: UserDB, token: str, request: Optional[Request] = None
     ):
-        print(f"Verification requested for user {user.id}. Verification token: {token}")
+        logger.info(f"Verification requested for user {user.id}.")
 
     async def on_after_update(
         self, user: UserDB, update_dict: dict, request: Optional[Request] = None
     ):
-        print(f"User {user.id} has been updated with {update_dict}.")
+        # Field names only, the update may carry a new password
+        logger.info(f"User {user.id} has been updated ({', '.join(update_dict)}).")
         
     async def on_before_delete(
         self, user: UserDB, request: Optional[Request] = None
     ):
-        print(f"User {user.id} is about to be deleted.")
+        logger.info(f"User {user.id} is about to be deleted.")
         
         # Delete user preferences
         try:
@@ -83,7 +87,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[UserCreate, UserDB]):
                     where={"userId": str(user.id)}
                 )
         except Exception as e:
-            print(f"Error deleting user preferences: {e}")
+            logger.error(f"Error deleting user preferences: {e}")
 
 # Get user manager
 async def get_user_manager(user_db = Depends(get_user_db)):
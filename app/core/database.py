@@ -1,20 +1,69 @@
 # File: app/core/database.py
 # Path: fanfix-api/app/core/database.py
 
+import asyncio
 import asyncpg
+import logging
+import numpy as np
 import os
-from typing import AsyncGenerator
+import struct
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Union
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+def encode_vector(embedding: Union[np.ndarray, List[float]]) -> bytes:
+    """Encode an embedding in pgvector's binary format (dim, unused, float4 values)"""
+    vector = np.ascontiguousarray(embedding, dtype=">f4")
+    return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decode an embedding from pgvector's binary format into a float32 array"""
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).astype(np.float32)
+
+def hnsw_server_settings() -> Dict[str, str]:
+    """
+    HNSW search settings sent as connection startup parameters.
+    
+    A plain SET would not last, the pool runs RESET ALL whenever a connection
+    is released, while startup parameters become the session defaults.
+    """
+    return {
+        # HNSW scans return at most ef_search rows, and the creatorId filter is
+        # applied afterwards, so the default of 40 starves the candidate stage
+        "hnsw.ef_search": str(int(settings.HNSW_EF_SEARCH)),
+        # pgvector >= 0.8 keeps scanning until enough rows pass the filter,
+        # older versions drop the unknown setting with a warning
+        "hnsw.iterative_scan": "relaxed_order",
+    }
+
+async def init_connection(conn: asyncpg.Connection):
+    """Register the pgvector codec on a new connection"""
+    try:
+        await conn.set_type_codec(
+            "vector",
+            encoder=encode_vector,
+            decoder=decode_vector,
+            format="binary"
+        )
+    except ValueError:
+        # pgvector extension is not installed yet, init_db_pool will create it
+        pass
+
 # Initialize the PostgreSQL connection pool
 async def init_db_pool():
     """Initialize the PostgreSQL connection pool with pgvector extension"""
     pool = await asyncpg.create_pool(
         settings.DATABASE_URL,
-        min_size=2,
-        max_size=10
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        server_settings=hnsw_server_settings(),
+        init=init_connection
     )
     
     # Check if the pool is created successfully
@@ -32,41 +81,57 @@ async def init_db_pool():
             if not pgvector_exists:
                 # Try to create the extension
                 await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-                print("pgvector extension enabled successfully")
+                logger.info("pgvector extension enabled successfully")
+                # Reconnect so the vector codec gets registered on every connection
+                await pool.expire_connections()
             else:
-                print("pgvector extension is already enabled")
+                logger.info("pgvector extension is already enabled")
                 
-            # Check if VectorStore table exists
-            table_exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM information_schema.tables WHERE table_name = 'VectorStore')"
-            )
-            
-            # Check if vector index exists
-            if table_exists:
-                index_exists = await conn.fetchval(
-                    "SELECT EXISTS(SELECT 1 FROM pg_indexes WHERE indexname = 'vectorstore_embedding_idx')"
-                )
-                
-                if not index_exists:
-                    # Create the vector index manually
-                    print("Creating vector index for VectorStore table...")
-                    try:
-                        # Create the vector index using raw SQL
-                        await conn.execute(
-                            "CREATE INDEX vectorstore_embedding_idx ON \"VectorStore\" USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
-                        )
-                        print("Vector index created successfully")
-                    except Exception as e:
-                        print(f"Error creating vector index: {e}")
-                        # Continue execution even if index creation fails
-                        # This allows the application to start and the index can be created later
+            # Normalizing stored embeddings and building the binary index are a
+            # one-off migration (prisma/vector_store.sql, run by init-database.sh)
+            # so they don't rescan the table on every boot in every worker
             
         except Exception as e:
-            print(f"Database initialization error: {e}")
+            logger.error(f"Database initialization error: {e}")
             raise
     
     return pool
 
+class DatabaseHealthCheck:
+    """
+    Checks the pool with SELECT 1 and reuses the result for ttl seconds,
+    so bursts of probes cost at most one query per ttl
+    """
+    
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._healthy = False
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    def _is_fresh(self) -> bool:
+        return self._checked_at is not None and time.monotonic() - self._checked_at < self.ttl
+    
+    async def check(self, pool: Optional[asyncpg.Pool]) -> bool:
+        """Return whether the database answered within the last ttl seconds"""
+        if pool is None:
+            return False
+        if self._is_fresh():
+            return self._healthy
+        
+        # Concurrent callers wait for the probe already in flight
+        async with self._lock:
+            if not self._is_fresh():
+                try:
+                    self._healthy = await pool.fetchval("SELECT 1") == 1
+                except Exception as e:
+                    logger.error(f"Database connection error: {e}")
+                    self._healthy = False
+                self._checked_at = time.monotonic()
+        return self._healthy
+
+database_health = DatabaseHealthCheck()
+
 # Context manager for database access
 @asynccontextmanager
 async def get_db_pool() -> AsyncGenerator[asyncpg.Pool, None]:
@@ -0,0 +1,34 @@
+# File: app/core/logging_config.py
+# Path: fanfix-api/app/core/logging_config.py
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Route all log records through an in-memory queue drained by a background thread.
+    
+    Writing to stdout can block when it is a full pipe (Docker, systemd), so code
+    running on the event loop only ever enqueues records.
+    """
+    log_queue = queue.SimpleQueue()
+    
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    
+    # The queue side only merges args into the message, the listener's handler
+    # applies the actual format
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    # force replaces handlers installed by modules imported earlier
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    
+    listener.start()
+    # Flush queued records on interpreter exit
+    atexit.register(listener.stop)
+    return listener
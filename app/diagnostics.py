@@ -1,22 +1,66 @@
 # File: app/diagnostics.py
 # Path: fanfix-api/app/diagnostics.py
 
-import json
 import logging
+import orjson
 import traceback
-from fastapi import APIRouter, Request, Response
-from fastapi.responses import JSONResponse, HTMLResponse
+from functools import lru_cache
+from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse, HTMLResponse
 from fastapi.openapi.utils import get_openapi
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 
+from app.core.database import database_health
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create diagnostics router
 router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
 
+def openapi_json_bytes(app: FastAPI) -> bytes:
+    """Serialized OpenAPI schema, re-encoded only when the cached schema is replaced"""
+    schema = app.openapi()
+    cached = getattr(app.state, "openapi_json", None)
+    if cached is None or cached[0] is not schema:
+        cached = (schema, orjson.dumps(schema))
+        app.state.openapi_json = cached
+    return cached[1]
+
+def routes_payload(app: FastAPI) -> Dict[str, Any]:
+    """Route listing for /diagnostics/routes, built once since routes don't change after startup"""
+    payload = getattr(app.state, "routes_payload", None)
+    if payload is None:
+        routes = []
+        for route in app.routes:
+            route_info = {
+                "path": getattr(route, "path", str(route)),
+                "name": getattr(route, "name", None),
+                "methods": sorted(getattr(route, "methods", None) or []) or None,
+                "endpoint": str(getattr(route, "endpoint", None)),
+                "response_model": str(getattr(route, "response_model", None)),
+            }
+            routes.append(route_info)
+        payload = {"routes": routes}
+        app.state.routes_payload = payload
+    return payload
+
+@lru_cache(maxsize=1)
+def static_diagnostic_info() -> Dict[str, str]:
+    """Diagnostic fields that can't change while the process runs"""
+    import sys
+    import os
+    import fastapi
+    import prisma
+    
+    return {
+        "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+        "fastapi_version": fastapi.__version__,
+        "prisma_version": getattr(prisma, "__version__", "unknown"),
+        "environment": os.environ.get("ENVIRONMENT", "production"),
+    }
+
 class DiagnosticInfo(BaseModel):
     """Model for diagnostic information"""
     app_version: str
@@ -34,35 +78,17 @@ async def get_diagnostic_info(request: Request) -> DiagnosticInfo:
     """
     Get diagnostic information about the API
     """
-    import sys
-    import os
-    import fastapi
-    import prisma
-
     app = request.app
     
-    # Check database connection
-    from prisma import Prisma
-    prisma_client = Prisma()
-    db_connected = False
-    try:
-        await prisma_client.connect()
-        db_connected = True
-        await prisma_client.disconnect()
-    except Exception as e:
-        logger.error(f"Database connection error: {e}")
+    # Check database connection on the shared pool, at most once per second
+    db_connected = await database_health.check(getattr(app.state, "db_pool", None))
     
     # Get OpenAPI schema size and check for errors
     openapi_schema_size = 0
     openapi_errors = []
     try:
-        schema = get_openapi(
-            title=app.title,
-            version=app.version,
-            description=app.description,
-            routes=app.routes,
-        )
-        openapi_schema_size = len(json.dumps(schema))
+        # Uses the app's cached schema instead of regenerating it per call
+        openapi_schema_size = len(openapi_json_bytes(app))
     except Exception as e:
         logger.error(f"OpenAPI schema error: {e}")
         openapi_errors.append(str(e))
@@ -70,57 +96,35 @@ async def get_diagnostic_info(request: Request) -> DiagnosticInfo:
     
     return DiagnosticInfo(
         app_version=app.version,
-        python_version=f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
-        fastapi_version=fastapi.__version__,
-        prisma_version=getattr(prisma, "__version__", "unknown"),
-        environment=os.environ.get("ENVIRONMENT", "production"),
+        **static_diagnostic_info(),
         database_connected=db_connected,
         routes_count=len(app.routes),
         openapi_schema_size=openapi_schema_size,
         openapi_errors=openapi_errors if openapi_errors else None
     )
 
-@router.get("/openapi", response_class=JSONResponse)
-async def get_raw_openapi(request: Request) -> JSONResponse:
+@router.get("/openapi", response_class=ORJSONResponse)
+async def get_raw_openapi(request: Request) -> Response:
     """
     Get the raw OpenAPI schema for debugging
     """
     app = request.app
     try:
-        # Try to generate the schema directly
-        schema = get_openapi(
-            title=app.title,
-            version=app.version,
-            description=app.description,
-            routes=app.routes,
-        )
-        return JSONResponse(schema)
+        # Built once by app.openapi() and reused until /reload-openapi clears it
+        return Response(content=openapi_json_bytes(app), media_type="application/json")
     except Exception as e:
         logger.error(f"Error generating OpenAPI schema: {e}")
-        return JSONResponse({
+        return ORJSONResponse({
             "error": str(e),
             "traceback": traceback.format_exc()
         }, status_code=500)
 
-@router.get("/routes", response_class=JSONResponse)
-async def get_routes(request: Request) -> JSONResponse:
+@router.get("/routes", response_class=ORJSONResponse)
+async def get_routes(request: Request) -> ORJSONResponse:
     """
     Get a list of all routes registered in the app
     """
-    app = request.app
-    routes = []
-    
-    for route in app.routes:
-        route_info = {
-            "path": getattr(route, "path", str(route)),
-            "name": getattr(route, "name", None),
-            "methods": getattr(route, "methods", None),
-            "endpoint": str(getattr(route, "endpoint", None)),
-            "response_model": str(getattr(route, "response_model", None)),
-        }
-        routes.append(route_info)
-    
-    return JSONResponse({"routes": routes})
+    return ORJSONResponse(routes_payload(request.app))
 
 @router.get("/docs-fallback", response_class=HTMLResponse)
 async def get_docs_fallback() -> HTMLResponse:
@@ -261,7 +265,7 @@ async def get_docs_fallback() -> HTMLResponse:
     return HTMLResponse(content=html_content)
 
 @router.get("/fix-openapi")
-async def fix_openapi(request: Request) -> JSONResponse:
+async def fix_openapi(request: Request) -> ORJSONResponse:
     """
     Attempt to fix OpenAPI schema issues
     """
@@ -312,7 +316,7 @@ async def fix_openapi(request: Request) -> JSONResponse:
     # Set the minimal schema
     app.openapi_schema = minimal_schema
     
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "success",
         "message": "Applied minimal OpenAPI schema",
         "route_count": len(minimal_schema["paths"]),
@@ -320,7 +324,7 @@ async def fix_openapi(request: Request) -> JSONResponse:
     })
 
 @router.get("/check-models")
-async def check_models() -> JSONResponse:
+async def check_models() -> ORJSONResponse:
     """
     Check all models for OpenAPI compatibility issues
     """
@@ -352,7 +356,7 @@ async def check_models() -> JSONResponse:
                 except Exception as e:
                     model_issues.append(f"Model {name} has schema error: {str(e)}")
     
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "success" if not model_issues else "issues_found",
         "model_issues": model_issues
     })
\ No newline at end of file
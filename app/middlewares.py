@@ -1,48 +1,168 @@
 # File: app/middlewares.py
 # Path: fanfix-api/app/middlewares.py
 
-from fastapi import Request, Response
-from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
 import time
 import logging
-from typing import Callable
 import json
+import re
+from typing import Optional, Sequence, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Configure logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+SAFELISTED_HEADERS = {"Accept", "Accept-Language", "Content-Language", "Content-Type"}
+
+class CORSPolicy:
     """
-    Middleware for logging request information and timing
+    CORS rules with origin matching compiled once at startup
+
+    Same semantics as Starlette's CORSMiddleware: origins are matched exactly
+    (as raw header bytes against a frozenset) unless allow_origin_regex is
+    given, and preflights asking for a method or header outside the allowed
+    lists are rejected. Preflight responses are built from precomputed headers.
     """
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
+
+    def __init__(
+        self,
+        allow_origins: Sequence[str] = (),
+        allow_credentials: bool = False,
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_origin_regex: Optional[str] = None,
+        max_age: int = 600,
+    ):
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_credentials = allow_credentials
+
+        self.origins = frozenset(origin.encode("latin-1") for origin in allow_origins)
+        self.origin_regex = re.compile(allow_origin_regex.encode("latin-1")) if allow_origin_regex else None
+
+        # With credentials the allowed origin must be echoed back, never "*"
+        self.echo_origin = allow_credentials or not self.allow_all_origins
+
+        self.allow_methods = frozenset(ALL_METHODS if "*" in allow_methods else allow_methods)
+        self.allow_headers = frozenset(
+            header.lower() for header in SAFELISTED_HEADERS.union(allow_headers)
+        )
+        self.preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(sorted(self.allow_methods)).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"content-type", b"text/plain; charset=utf-8"),
+        ]
+        if not self.allow_all_headers:
+            self.preflight_headers.append(
+                (b"access-control-allow-headers", ", ".join(sorted(self.allow_headers)).encode("latin-1"))
+            )
+
+    def is_allowed_origin(self, origin: bytes) -> bool:
+        if self.allow_all_origins or origin in self.origins:
+            return True
+        return self.origin_regex is not None and self.origin_regex.fullmatch(origin) is not None
+
+    def origin_headers(self, origin: bytes) -> list:
+        """Headers that grant an allowed origin access to a response"""
+        if not self.echo_origin:
+            return [(b"access-control-allow-origin", b"*")]
+        headers = [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        if self.allow_credentials:
+            headers.append((b"access-control-allow-credentials", b"true"))
+        return headers
+
+    def preflight_response(
+        self, origin: bytes, request_method: bytes, request_headers: Optional[bytes]
+    ) -> Tuple[int, list, bytes]:
+        """Status, headers and body answering a preflight request"""
+        failures = []
+        if not self.is_allowed_origin(origin):
+            failures.append("origin")
+        if request_method.decode("latin-1") not in self.allow_methods:
+            failures.append("method")
+        if request_headers and not self.allow_all_headers:
+            for header in request_headers.decode("latin-1").lower().split(","):
+                if header.strip() not in self.allow_headers:
+                    failures.append("headers")
+                    break
+
+        if failures:
+            status, body = 400, ("Disallowed CORS " + ", ".join(failures)).encode("latin-1")
+            headers = list(self.preflight_headers)
+        else:
+            status, body = 200, b"OK"
+            headers = self.preflight_headers + self.origin_headers(origin)
+            if self.allow_all_headers and request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        return status, headers, body
+
+class RequestPipelineMiddleware:
+    """
+    CORS, request timing and request logging in a single ASGI middleware
+
+    Doing all three in one layer means one coroutine frame and one send
+    wrapper per request instead of one per middleware
+    """
+
+    def __init__(self, app: ASGIApp, cors: CORSPolicy):
+        self.app = app
+        self.cors = cors
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
         # Get request details
-        method = request.method
-        path = request.url.path
-        client_host = request.client.host if request.client else "unknown"
-        
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
+        client_host = client[0] if client else "unknown"
+        status_code = 500
+
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        extra_headers = []
+        if origin is not None:
+            # Answer preflight requests here without reaching the app
+            if method == "OPTIONS" and request_method is not None:
+                status_code, headers, body = self.cors.preflight_response(
+                    origin, request_method, request_headers
+                )
+                await send({"type": "http.response.start", "status": status_code, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                self.log_request(client_host, method, path, status_code, start_time)
+                return
+
+            if self.cors.is_allowed_origin(origin):
+                extra_headers = self.cors.origin_headers(origin)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+                # Add CORS and process time headers
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", []))
+                headers.extend(extra_headers)
+                headers.append((b"x-process-time", f"{process_time:.4f}".encode()))
+                message["headers"] = headers
+            await send(message)
+
         # Process request
         try:
-            response = await call_next(request)
-            
-            # Calculate processing time
-            process_time = time.time() - start_time
-            
-            # Log request details
-            logger.info(
-                f"{client_host} - {method} {path} {response.status_code} - "
-                f"{process_time:.4f}s"
-            )
-            
-            # Add process time header
-            response.headers["X-Process-Time"] = f"{process_time:.4f}"
-            
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Log error
             logger.error(
@@ -50,22 +170,66 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             )
             raise
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+        self.log_request(client_host, method, path, status_code, start_time)
+
+    @staticmethod
+    def log_request(client_host: str, method: str, path: str, status_code: int, start_time: float):
+        # Calculate processing time
+        process_time = time.perf_counter() - start_time
+
+        # Log request details
+        logger.info(
+            f"{client_host} - {method} {path} {status_code} - "
+            f"{process_time:.4f}s"
+        )
+
+class HealthCheckMiddleware:
+    """
+    Answers health probes before routing and the other middlewares run
+
+    Load balancers hit this endpoint constantly, so the response is sent from
+    precomputed bytes without dependency resolution or JSON encoding
+    """
+
+    body = b'{"status":"ok"}'
+
+    def __init__(self, app: ASGIApp, path: str = "/health"):
+        self.app = app
+        self.path = path
+        self.headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self.body)).encode()),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"] == self.path and scope["method"] in ("GET", "HEAD"):
+            await send({"type": "http.response.start", "status": 200, "headers": self.headers})
+            await send({"type": "http.response.body", "body": self.body if scope["method"] == "GET" else b""})
+            return
+
+        await self.app(scope, receive, send)
+
+class RateLimitMiddleware:
     """
     Simple in-memory rate limiting middleware
     For production, consider using Redis for distributed rate limiting
     """
-    
-    def __init__(self, app, max_requests: int = 100, window_seconds: int = 60):
-        super().__init__(app)
+
+    def __init__(self, app: ASGIApp, max_requests: int = 100, window_seconds: int = 60):
+        self.app = app
         self.max_requests = max_requests
         self.window_seconds = window_seconds
         self.requests = {}  # client_ip -> [(timestamp, count), ...]
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Get client IP
-        client_ip = request.client.host if request.client else "unknown"
-        
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+
         # Clean old records
         current_time = time.time()
         if client_ip in self.requests:
@@ -73,38 +237,45 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 record for record in self.requests[client_ip]
                 if current_time - record[0] < self.window_seconds
             ]
-        
+
         # Check if rate limit exceeded
         requests_count = sum(record[1] for record in self.requests.get(client_ip, []))
-        
+
         if requests_count >= self.max_requests:
             # Rate limit exceeded
-            return Response(
-                content=json.dumps({
-                    "detail": "Rate limit exceeded",
-                    "status_code": 429
-                }),
-                status_code=429,
-                media_type="application/json"
-            )
-        
+            body = json.dumps({
+                "detail": "Rate limit exceeded",
+                "status_code": 429
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
         # Update request count
         if client_ip not in self.requests:
             self.requests[client_ip] = [(current_time, 1)]
         else:
             self.requests[client_ip].append((current_time, 1))
-        
-        return await call_next(request)
 
-def setup_middlewares(app):
+        await self.app(scope, receive, send)
+
+def setup_middlewares(app, cors: CORSPolicy):
     """
     Configure and add middlewares to the FastAPI app
     """
-    # Add CORS middleware first (already added in main.py)
-    
-    # Add logging middleware
-    app.add_middleware(LoggingMiddleware)
-    
+    # Add CORS, timing and logging middleware
+    app.add_middleware(RequestPipelineMiddleware, cors=cors)
+
     # Add rate limiting middleware
     # Commented out because we're using FastAPI's built-in rate limiting
-    # app.add_middleware(RateLimitMiddleware, max_requests=100, window_seconds=60)
\ No newline at end of file
+    # app.add_middleware(RateLimitMiddleware, max_requests=100, window_seconds=60)
+
+    # Add health check middleware last so it wraps all the others
+    app.add_middleware(HealthCheckMiddleware)
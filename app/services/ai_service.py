@@ -1,8 +1,11 @@
 # File: app/services/ai_service.py (updated)
 # Path: fanfix-api/app/services/ai_service.py
 
+import asyncio
 import json
-from typing import List, Dict, Any, Optional
+import logging
+from typing import List, Dict, Any, Optional, Set
+from collections import OrderedDict
 from datetime import datetime
 
 # Updated imports for langchain 0.1.0+
@@ -11,6 +14,47 @@ from langchain_openai import OpenAIEmbeddings
 from langchain.schema.messages import HumanMessage, SystemMessage
 import openai
 
+logger = logging.getLogger(__name__)
+
+class OpenAIClientCache:
+    """
+    LRU of async OpenAI clients, one per API key.
+    
+    AIService is created per request with the user's key, so clients are kept
+    here to reuse their HTTP connection pool instead of opening a new one
+    on every call. Evicting a client closes it (in a background task, as
+    lookups happen in synchronous code) so its connections aren't left open
+    until garbage collection; close() closes the rest on shutdown.
+    """
+    
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._clients: "OrderedDict[str, openai.AsyncOpenAI]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+    
+    def get(self, api_key: str) -> openai.AsyncOpenAI:
+        """Return the client for an API key, creating it if needed"""
+        client = self._clients.get(api_key)
+        if client is None:
+            client = self._clients[api_key] = openai.AsyncOpenAI(api_key=api_key)
+            if len(self._clients) > self.maxsize:
+                _, evicted = self._clients.popitem(last=False)
+                task = asyncio.get_running_loop().create_task(evicted.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+        self._clients.move_to_end(api_key)
+        return client
+    
+    async def close(self):
+        """Close every cached client and wait for pending evictions"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(
+            *(client.close() for client in clients), *self._closing, return_exceptions=True
+        )
+
+openai_clients = OpenAIClientCache()
+
 class AIService:
     def __init__(self, api_key: str, model_name: str = "gpt-3.5-turbo"):
         self.api_key = api_key
@@ -22,19 +66,20 @@ class AIService:
             temperature=0.7
         )
         openai.api_key = api_key
+        # Async client so requests don't block the event loop while waiting
+        self.client = openai_clients.get(api_key)
     
     async def get_embedding(self, text: str) -> List[float]:
         """Get embedding vector for text using OpenAI's embeddings API"""
         try:
-            client = openai.OpenAI(api_key=self.api_key)
             # Updated for OpenAI API v1.0+
-            response = client.embeddings.create(
+            response = await self.client.embeddings.create(
                 input=text,
                 model="text-embedding-ada-002"
             )
             return response.data[0].embedding
         except Exception as e:
-            print(f"Error getting embedding: {e}")
+            logger.error(f"Error getting embedding: {e}")
             raise
     
     async def get_suggestions(
@@ -81,7 +126,7 @@ class AIService:
             
             return suggestions
         except Exception as e:
-            print(f"Error getting suggestions: {e}")
+            logger.error(f"Error getting suggestions: {e}")
             raise
     
     def _build_system_prompt(
@@ -185,6 +230,6 @@ You are an AI assistant for the FanFix platform that creates personalized respon
             # Fallback: create simple suggestions from text
             return [{"type": "single", "messages": [content.strip()]}]
         except Exception as e:
-            print(f"Error parsing suggestions: {e}")
+            logger.error(f"Error parsing suggestions: {e}")
             # Fallback
             return [{"type": "single", "messages": ["I'd be happy to chat with you!"]}]
\ No newline at end of file
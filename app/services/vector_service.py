@@ -1,46 +1,190 @@
 # File: app/services/vector_service.py
 # Path: fanfix-api/app/services/vector_service.py
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+from collections import OrderedDict
+import asyncio
 import asyncpg
+import hashlib
+import logging
+import numpy as np
 import os
+import time
 import uuid
 
-from app.core.config import settings
+from app.core.config import EMBEDDING_DIM, settings
+from app.core.database import hnsw_server_settings, init_connection
+
+logger = logging.getLogger(__name__)
+
+# Embeddings are accepted as float lists (as returned by OpenAI) or NumPy arrays
+Embedding = Union[np.ndarray, List[float]]
+
+class SimilarityCache:
+    """
+    In-process TTL/LRU cache for similarity search results.
+    
+    Entries are keyed by a hash of the query's packed sign bits, so
+    repeated and near-identical queries share one entry. Writes for a creator
+    bump that creator's generation, which orphans their cached entries.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+    
+    def make_key(self, creator_id: str, bits: bytes, *params: Any) -> Tuple:
+        """Build a cache key for a creator, packed query sign bits and search parameters"""
+        generation = self._generations.get(creator_id, 0)
+        sketch = hashlib.blake2b(bits, digest_size=16).digest()
+        return (creator_id, generation, params, sketch)
+    
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return a cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Tuple, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, creator_id: Optional[str] = None):
+        """Invalidate cached results for one creator, or for all creators"""
+        if creator_id is None:
+            self._entries.clear()
+            self._generations.clear()
+        else:
+            self._generations[creator_id] = self._generations.get(creator_id, 0) + 1
+
+# Shared across VectorService instances, which are created per request
+similarity_cache = SimilarityCache(
+    maxsize=settings.SIMILARITY_CACHE_SIZE,
+    ttl=settings.SIMILARITY_CACHE_TTL_SECONDS
+)
 
 class VectorService:
-    def __init__(self):
-        self.pool = None
+    """
+    Stores and searches conversation embeddings in the VectorStore table.
+    
+    Embeddings are L2-normalized before they are stored or searched, so cosine
+    similarity equals the inner product and searches use pgvector's negative
+    inner product operator (<#>) instead of cosine distance (<=>).
+    """
+    
+    def __init__(self, pool: Optional[asyncpg.Pool] = None):
+        # Normally the app-wide pool from app.state.db_pool, see get_vector_service
+        self.pool = pool
         self.connection_string = settings.DATABASE_URL
+        self._dim = EMBEDDING_DIM
     
     async def init_pool(self):
-        """Initialize connection pool if not already initialized"""
+        """Initialize a dedicated connection pool if no shared pool was given"""
         if self.pool is None:
-            self.pool = await asyncpg.create_pool(self.connection_string)
+            self.pool = await asyncpg.create_pool(
+                self.connection_string,
+                server_settings=hnsw_server_settings(),
+                init=init_connection
+            )
+    
+    def _check_dim(self, embedding: Embedding):
+        """Validate that an embedding matches the stored vector dimension"""
+        if len(embedding) != self._dim:
+            raise ValueError(
+                f"Expected embedding with {self._dim} dimensions, got {len(embedding)}"
+            )
+    
+    @staticmethod
+    def _prep_embedding(embedding: Embedding) -> Tuple[np.ndarray, bytes]:
+        """
+        Prepare an embedding for storage or search.
+        
+        Returns the L2-normalized contiguous float32 vector (sent as-is by the
+        vector codec) and its sign bits packed like pgvector's binary_quantize.
+        Store and search paths both go through here so they always agree.
+        """
+        vector = np.ascontiguousarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) + 1e-12)
+        return vector, np.packbits(vector > 0).tobytes()
+    
+    async def _prep_embeddings(self, embeddings: List[Embedding]) -> List[Tuple[np.ndarray, bytes]]:
+        """Run _prep_embedding in a worker thread to keep NumPy work off the event loop"""
+        return await asyncio.to_thread(
+            lambda: [self._prep_embedding(embedding) for embedding in embeddings]
+        )
     
     async def find_similar_conversations(
         self, 
-        embedding: List[float], 
+        embedding: Embedding, 
         creator_id: str, 
         limit: int = 3, 
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        oversample: int = 10
     ) -> List[Dict[str, Any]]:
-        """Find similar conversations using vector similarity"""
+        """
+        Find similar conversations using vector similarity.
+        
+        Candidates are first pulled by Hamming distance on the binary-quantized
+        embedding (limit * oversample rows), then rescored with the full-precision
+        inner product.
+        """
+        self._check_dim(embedding)
+        [(embedding, bits)] = await self._prep_embeddings([embedding])
+        
+        cache_key = similarity_cache.make_key(
+            creator_id, bits, limit, similarity_threshold, oversample
+        )
+        cached = similarity_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
         await self.init_pool()
         
-        query = """
+        query = f"""
+        WITH candidates AS (
+            SELECT id
+            FROM "VectorStore"
+            WHERE "creatorId" = $2
+            ORDER BY "embeddingBits" <~> $6::bit({EMBEDDING_DIM})
+            LIMIT $5
+        ),
+        scored AS MATERIALIZED (
+            SELECT v.id, v."fanMessage", v."creatorResponses", 
+                   v.embedding <#> $1 as distance
+            FROM "VectorStore" v
+            JOIN candidates USING (id)
+        )
         SELECT id, "fanMessage", "creatorResponses", 
-               1 - (embedding <=> $1) as similarity
-        FROM "VectorStore"
-        WHERE "creatorId" = $2
-          AND (1 - (embedding <=> $1)) > $3
-        ORDER BY similarity DESC
+               -distance as similarity
+        FROM scored
+        WHERE distance < $3
+        ORDER BY distance
         LIMIT $4
         """
         
         async with self.pool.acquire() as conn:
             try:
-                rows = await conn.fetch(query, embedding, creator_id, similarity_threshold, limit)
+                # Candidate count and the distance cutoff (<#> is the negative inner
+                # product) are computed here, Postgres can't infer the types of
+                # arithmetic on bare parameters
+                rows = await conn.fetch(
+                    query, embedding, creator_id, -similarity_threshold, limit, limit * oversample, bits
+                )
                 
                 result = []
                 for row in rows:
@@ -51,25 +195,100 @@ class VectorService:
                         "similarity": row["similarity"]
                     })
                 
-                return result
+                similarity_cache.set(cache_key, result)
+                return list(result)
             except Exception as e:
-                print(f"Error finding similar conversations: {e}")
+                logger.error(f"Error finding similar conversations: {e}")
                 # If the query fails, return an empty list
                 return []
     
+    async def find_similar_conversations_batch(
+        self, 
+        embeddings: List[Embedding], 
+        creator_id: str, 
+        limit: int = 3, 
+        similarity_threshold: float = 0.7,
+        oversample: int = 10
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Find similar conversations for several query embeddings in one round trip.
+        
+        Runs the same two-stage search as find_similar_conversations for each
+        query inside a LATERAL join and returns one result list per query, in
+        the order the embeddings were given.
+        """
+        for embedding in embeddings:
+            self._check_dim(embedding)
+        prepared = await self._prep_embeddings(embeddings)
+        await self.init_pool()
+        
+        query = f"""
+        SELECT q.idx, c.id, c."fanMessage", c."creatorResponses", 
+               -c.distance as similarity
+        FROM unnest($1::vector[], $6::bit({EMBEDDING_DIM})[]) WITH ORDINALITY AS q(embedding, bits, idx)
+        CROSS JOIN LATERAL (
+            SELECT v.id, v."fanMessage", v."creatorResponses", 
+                   v.embedding <#> q.embedding as distance
+            FROM (
+                SELECT id
+                FROM "VectorStore"
+                WHERE "creatorId" = $2
+                ORDER BY "embeddingBits" <~> q.bits
+                LIMIT $5
+            ) candidates
+            JOIN "VectorStore" v USING (id)
+            ORDER BY distance
+            LIMIT $4
+        ) c
+        WHERE c.distance < $3
+        ORDER BY q.idx, c.distance
+        """
+        
+        results = [[] for _ in prepared]
+        
+        async with self.pool.acquire() as conn:
+            try:
+                # Same precomputed candidate count and cutoff as find_similar_conversations
+                rows = await conn.fetch(
+                    query, 
+                    # asyncpg would treat each ndarray as a nested array dimension,
+                    # a memoryview is passed to the vector codec as one element
+                    [memoryview(vector) for vector, _ in prepared], 
+                    creator_id, 
+                    -similarity_threshold, 
+                    limit, 
+                    limit * oversample, 
+                    [bits for _, bits in prepared]
+                )
+                
+                for row in rows:
+                    results[row["idx"] - 1].append({
+                        "id": row["id"],
+                        "fanMessage": row["fanMessage"],
+                        "creatorResponses": row["creatorResponses"],
+                        "similarity": row["similarity"]
+                    })
+                
+                return results
+            except Exception as e:
+                logger.error(f"Error finding similar conversations in batch: {e}")
+                return [[] for _ in prepared]
+    
     async def store_conversation(
         self, 
         creator_id: str, 
         fan_message: str, 
         creator_responses: List[str], 
-        embedding: List[float]
+        embedding: Embedding
     ) -> str:
         """Store a conversation with its embedding vector"""
+        self._check_dim(embedding)
+        [(embedding, bits)] = await self._prep_embeddings([embedding])
         await self.init_pool()
         
         query = """
-        INSERT INTO "VectorStore" ("id", "creatorId", "fanMessage", "creatorResponses", embedding)
-        VALUES ($1, $2, $3, $4, $5)
+        INSERT INTO "VectorStore" ("id", "creatorId", "fanMessage", "creatorResponses", embedding, "embeddingBits")
+        VALUES ($1, $2, $3, $4, $5, $6)
         RETURNING id
         """
         
@@ -83,11 +302,13 @@ class VectorService:
                     creator_id, 
                     fan_message, 
                     creator_responses, 
-                    embedding
+                    embedding,
+                    bits
                 )
+                similarity_cache.invalidate(creator_id)
                 return row["id"]
             except Exception as e:
-                print(f"Error storing conversation: {e}")
+                logger.error(f"Error storing conversation: {e}")
                 # Return a generated ID even if storage fails
                 return conversation_id
     
@@ -121,7 +342,7 @@ class VectorService:
                 "latest_timestamp": row["latest_timestamp"]
             }
         except Exception as e:
-            print(f"Error getting conversation stats: {e}")
+            logger.error(f"Error getting conversation stats: {e}")
             return {
                 "total_conversations": 0,
                 "latest_timestamp": None
@@ -144,7 +365,8 @@ class VectorService:
             # Parse the DELETE count from the result string
             # Example format: "DELETE 42"
             count = int(result.split()[1]) if "DELETE" in result else 0
+            similarity_cache.invalidate(creator_id or None)
             return count
         except Exception as e:
-            print(f"Error clearing conversations: {e}")
+            logger.error(f"Error clearing conversations: {e}")
             return 0
\ No newline at end of file
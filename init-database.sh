@@ -27,34 +27,16 @@ echo -e "${GREEN}Database is ready!${NC}"
 echo -e "${YELLOW}Enabling pgvector extension...${NC}"
 PGPASSWORD=$POSTGRES_PASSWORD psql -h db -U postgres -d chat_assistant_db -c "CREATE EXTENSION IF NOT EXISTS vector;"
 
-# Create vector index if needed (after Prisma has created the tables)
-echo -e "${YELLOW}Setting up vector indexes (will be retried by the application if tables don't exist yet)...${NC}"
-PGPASSWORD=$POSTGRES_PASSWORD psql -h db -U postgres -d chat_assistant_db -c "
-DO \$\$
-BEGIN
-  IF EXISTS (
-    SELECT 1
-    FROM information_schema.tables
-    WHERE table_name = 'VectorStore'
-  ) THEN
-    IF NOT EXISTS (
-      SELECT 1
-      FROM pg_indexes
-      WHERE indexname = 'vectorstore_embedding_idx'
-    ) THEN
-      EXECUTE 'CREATE INDEX vectorstore_embedding_idx ON \"VectorStore\" USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100)';
-      RAISE NOTICE 'Vector index created';
-    ELSE
-      RAISE NOTICE 'Vector index already exists';
-    END IF;
-  ELSE
-    RAISE NOTICE 'VectorStore table does not exist yet';
-  END IF;
-END
-\$\$;
-"
+# Upgrade the extension's SQL objects on volumes created with an older image,
+# a newer shared library alone doesn't add binary_quantize or bit_hamming_ops
+PGPASSWORD=$POSTGRES_PASSWORD psql -h db -U postgres -d chat_assistant_db -c "ALTER EXTENSION vector UPDATE;"
+
+# One-off VectorStore migration (normalized embeddings, binary index), skipped once applied
+echo -e "${YELLOW}Migrating VectorStore search columns...${NC}"
+PGPASSWORD=$POSTGRES_PASSWORD psql -h db -U postgres -d chat_assistant_db -v ON_ERROR_STOP=1 -f /app/prisma/vector_store.sql
 
 echo -e "${GREEN}Database initialization completed!${NC}"
 
 # Run the application
-exec uvicorn main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Worker count comes from WEB_CONCURRENCY (default 1)
+exec uvicorn main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --no-access-log
\ No newline at end of file
@@ -6,21 +6,23 @@ import sys
 import json
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from prisma import Prisma
 from fastapi.openapi.utils import get_openapi
 import logging
 
 from app.core.config import settings
+from app.core.logging_config import setup_logging
 from app.auth.router import router as auth_router
 from app.api.creators import router as creators_router
 from app.api.suggestions import router as suggestions_router
-from app.middlewares import setup_middlewares
-from app.diagnostics import router as diagnostics_router
+from app.middlewares import CORSPolicy, setup_middlewares
+from app.diagnostics import openapi_json_bytes, routes_payload, router as diagnostics_router
+from app.services.ai_service import openai_clients
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging, records are written to stdout by a background thread
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # Initialize Prisma client
@@ -29,17 +31,19 @@ prisma = Prisma()
 # Create lifespan context manager instead of using on_event
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    app.state.db_pool = None
+    
     # Connect to database on startup
     try:
         logger.info("Connecting to database...")
         await prisma.connect()
         logger.info("Database connection established successfully")
         
-        # Initialize database if tables don't exist
+        # Initialize database if tables don't exist and keep the pool open
+        # so requests reuse its connections instead of reconnecting
         try:
             from app.core.database import init_db_pool
-            db_pool = await init_db_pool()
-            await db_pool.close()
+            app.state.db_pool = await init_db_pool()
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
@@ -48,14 +52,24 @@ async def lifespan(app: FastAPI):
         # Don't exit here, continue to allow the app to start
         # This helps when deploying to environments where the DB might be temporarily unavailable
     
+    # Build the OpenAPI schema and route listing now so the first requests don't pay for them
+    openapi_bytes = openapi_json_bytes(app)
+    logger.info(f"OpenAPI schema prepared ({len(openapi_bytes)} bytes)")
+    routes_payload(app)
+    
     yield
     
     # Disconnect from database on shutdown
     try:
+        if app.state.db_pool is not None:
+            await app.state.db_pool.close()
         await prisma.disconnect()
         logger.info("Database connection closed successfully")
     except Exception as e:
         logger.error(f"Error disconnecting from database: {e}")
+    
+    # Close the OpenAI clients' HTTP connection pools
+    await openai_clients.close()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -63,23 +77,24 @@ app = FastAPI(
     description="AI-powered chat suggestions for creators",
     version="1.0.0",
     lifespan=lifespan,
-    docs_url="/docs",
-    redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    default_response_class=ORJSONResponse,
+    # Docs and schema routes are registered below so the schema is served from cached bytes
+    docs_url=None,
+    redoc_url=None,
+    openapi_url=None
 )
 
-# CORS middleware configuration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Set up custom middlewares, CORS is handled by the same middleware
+setup_middlewares(
+    app,
+    cors=CORSPolicy(
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
 )
 
-# Set up custom middlewares
-setup_middlewares(app)
-
 # Add exception handler for OpenAPI rendering errors
 @app.exception_handler(Exception)
 async def openapi_exception_handler(request: Request, exc: Exception):
@@ -89,7 +104,7 @@ async def openapi_exception_handler(request: Request, exc: Exception):
         
         # For OpenAPI JSON requests, return a minimal valid schema
         if request.url.path == "/openapi.json":
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=200,
                 content={
                     "openapi": "3.0.2",
@@ -105,7 +120,8 @@ async def openapi_exception_handler(request: Request, exc: Exception):
     # For other exceptions, let FastAPI handle it
     raise exc
 
-# Health check endpoint
+# Health check endpoint, kept for the OpenAPI docs
+# GET requests are answered by HealthCheckMiddleware before they reach the router
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
@@ -176,6 +192,26 @@ def simplified_openapi():
 # Set simplified OpenAPI schema generator
 app.openapi = simplified_openapi
 
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi_json():
+    return Response(content=openapi_json_bytes(app), media_type="application/json")
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui_html():
+    return get_swagger_ui_html(
+        openapi_url="/openapi.json",
+        title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url="/docs/oauth2-redirect"
+    )
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect():
+    return get_swagger_ui_oauth2_redirect_html()
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc_html():
+    return get_redoc_html(openapi_url="/openapi.json", title=f"{app.title} - ReDoc")
+
 # Add redirect from root to docs
 @app.get("/", include_in_schema=False)
 async def redirect_to_docs():
@@ -191,4 +227,16 @@ async def reload_openapi():
 # Run the application
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.environ.get("ENVIRONMENT") == "development":
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.environ.get("WEB_CONCURRENCY", "1")),
+            # RequestPipelineMiddleware already logs every request
+            access_log=False
+        )
\ No newline at end of file
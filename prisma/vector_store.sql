@@ -0,0 +1,37 @@
+-- File: prisma/vector_store.sql
+-- Path: fanfix-api/prisma/vector_store.sql
+
+-- One-off migration for the VectorStore similarity search columns, run by
+-- init-database.sh before the app starts. Once vectorstore_embedding_bits_idx
+-- exists it does nothing, so later boots skip the full-table scans.
+DO $$
+BEGIN
+    -- Serialize containers that start at the same time
+    PERFORM pg_advisory_xact_lock(hashtext('vectorstore_embedding_bits_migration'));
+
+    -- Table not created yet (prisma db push) or migration already applied
+    IF to_regclass('"VectorStore"') IS NULL
+       OR to_regclass('vectorstore_embedding_bits_idx') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    -- Searches go through the binary index below and rescore candidates
+    -- by inner product, so the old ivfflat cosine index is never used
+    DROP INDEX IF EXISTS vectorstore_embedding_idx;
+
+    -- Similarity search relies on unit-length embeddings (see VectorService),
+    -- rows stored by the app since then are normalized on insert
+    UPDATE "VectorStore" SET embedding = l2_normalize(embedding)
+    WHERE embedding IS NOT NULL AND abs(vector_norm(embedding) - 1) > 1e-3;
+
+    -- Binary-quantized shadow column used as a cheap Hamming-distance
+    -- prefilter before rescoring candidates with the full embedding
+    -- (width is EMBEDDING_DIM in app/core/config.py)
+    ALTER TABLE "VectorStore" ADD COLUMN IF NOT EXISTS "embeddingBits" bit(1536);
+    UPDATE "VectorStore" SET "embeddingBits" = binary_quantize(embedding)::bit(1536)
+    WHERE "embeddingBits" IS NULL AND embedding IS NOT NULL;
+
+    CREATE INDEX vectorstore_embedding_bits_idx ON "VectorStore"
+        USING hnsw ("embeddingBits" bit_hamming_ops) WITH (m = 16, ef_construction = 64);
+END
+$$;
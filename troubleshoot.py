@@ -13,9 +13,12 @@ import sys
 import json
 import importlib.util
 import inspect
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import argparse
-from typing import Dict, List, Any, Optional, Set, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple, ForwardRef, get_args, get_origin
 
 def print_header(text: str):
     """Print a section header"""
@@ -54,96 +57,197 @@ def load_module_from_path(module_path: str, module_name: Optional[str] = None) -
     spec.loader.exec_module(module)
     return module
 
-def check_pydantic_models(models_dir: str) -> List[str]:
-    """Check Pydantic models for potential OpenAPI issues"""
+# Directories that never contain app modules worth importing
+SKIPPED_DIRS = {"__pycache__", "migrations", "tests"}
+
+def find_python_files(package_dir: str) -> List[Path]:
+    """List the Python files under a package directory, skipping non-source directories"""
+    package_path = Path(package_dir).resolve()
+    return sorted(
+        path for path in package_path.rglob("*.py")
+        if SKIPPED_DIRS.isdisjoint(path.relative_to(package_path).parts)
+    )
+
+def import_module_file(module_file: Path, package_dir: str) -> Any:
+    """
+    Import a file under a package directory by its dotted name.
+    
+    Going through importlib.import_module reuses sys.modules, so a module imported
+    by several others is executed once and its classes are the same objects everywhere.
+    """
+    package_path = Path(package_dir).resolve()
+    root = str(package_path.parent)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    
+    module_name = ".".join(module_file.relative_to(package_path.parent).with_suffix("").parts)
+    return importlib.import_module(module_name)
+
+def import_package_modules(package_dir: str, py_files: Optional[List[Path]] = None) -> Tuple[List[Any], List[str]]:
+    """Import every module under a package directory once"""
+    modules = []
     issues = []
     
+    for module_file in py_files if py_files is not None else find_python_files(package_dir):
+        try:
+            modules.append(import_module_file(module_file, package_dir))
+        except Exception as e:
+            issues.append(f"Error processing file {module_file}: {str(e)}")
+    
+    return modules, issues
+
+def iter_type_args(annotation: Any):
+    """Yield an annotation and every type nested in its generic arguments"""
+    yield annotation
+    for arg in get_args(annotation):
+        yield from iter_type_args(arg)
+
+def check_dict_field(args: Tuple[Any, ...]) -> Optional[str]:
+    """Flag Dict[..., Any] fields"""
+    if Any in args:
+        return "with Dict[Any] which may cause OpenAPI issues"
+    return None
+
+def check_list_field(args: Tuple[Any, ...]) -> Optional[str]:
+    """Flag List[Dict[...]] fields"""
+    if args and get_origin(args[0]) is dict:
+        return "with nested complex type which may cause OpenAPI issues"
+    return None
+
+# Checks for generic field types, keyed by typing.get_origin of the type
+FIELD_ORIGIN_CHECKS = {
+    dict: check_dict_field,
+    list: check_list_field,
+}
+
+def check_pydantic_models(models_dir: str, py_files: Optional[List[Path]] = None) -> List[str]:
+    """Check Pydantic models for potential OpenAPI issues"""
     print_info(f"Scanning models in {models_dir}")
     
-    # Find all Python files in the models directory
-    model_files = list(Path(models_dir).glob("**/*.py"))
+    import pydantic
+    from pydantic import BaseModel
+    from pydantic.json_schema import models_json_schema
+    
+    if int(pydantic.VERSION.split(".")[0]) < 2:
+        return [f"Pydantic {pydantic.VERSION} is installed, but the app requires Pydantic v2"]
     
-    for model_file in model_files:
-        print_info(f"Checking {model_file}")
+    # Import every module once, then collect each model class once even if
+    # several modules import it
+    modules, issues = import_package_modules(models_dir, py_files)
+    seen: Set[type] = set()
+    models: List[Tuple[str, type]] = []
+    
+    for module in modules:
+        print_info(f"Checking {module.__name__}")
         try:
-            # Load the module
-            module = load_module_from_path(str(model_file))
-            if not module:
-                issues.append(f"Failed to load module: {model_file}")
-                continue
-            
             # Find all Pydantic models in the module
-            from pydantic import BaseModel
-            
-            for name, obj in inspect.getmembers(module):
-                if not inspect.isclass(obj):
-                    continue
-                
+            for name, obj in inspect.getmembers(module, inspect.isclass):
                 # Skip if it's not a Pydantic model
-                if not isinstance(obj, type) or not issubclass(obj, BaseModel) or obj == BaseModel:
+                if not issubclass(obj, BaseModel) or obj is BaseModel or obj in seen:
                     continue
+                seen.add(obj)
+                models.append((name, obj))
+        
+        except Exception as e:
+            issues.append(f"Error processing module {module.__name__}: {str(e)}")
+    
+    # Generate all schemas in one pass so shared definitions are built once,
+    # and only fall back to per-model generation to find the failing ones
+    failed: Set[type] = set()
+    try:
+        models_json_schema([(obj, "validation") for _, obj in models])
+    except Exception:
+        for name, obj in models:
+            try:
+                obj.model_json_schema()
+            except Exception as e:
+                failed.add(obj)
+                issues.append(f"Error generating schema for model {name}: {str(e)}")
+    
+    for name, obj in models:
+        if obj in failed:
+            continue
+        
+        print_info(f"  Checking model: {name}")
+        
+        try:
+            # Check for potential issues
+            for field_name, field in obj.model_fields.items():
+                # Check if field type is unsupported in OpenAPI
+                annotation = field.annotation
                 
-                print_info(f"  Checking model: {name}")
+                # Check for Any type
+                if annotation is Any:
+                    issues.append(f"Model {name} has field '{field_name}' with type Any which may cause OpenAPI issues")
                 
-                try:
-                    # Try to generate schema
-                    schema = obj.schema()
-                    
-                    # Check for potential issues
-                    for field_name, field in obj.__fields__.items():
-                        # Check if field type is unsupported in OpenAPI
-                        field_type = field.type_
-                        field_type_name = str(field_type)
-                        
-                        # Check for Any type
-                        if field_type_name == 'typing.Any':
-                            issues.append(f"Model {name} has field '{field_name}' with type Any which may cause OpenAPI issues")
-                        
-                        # Check for complex generic types
-                        if 'typing.Dict[' in field_type_name and 'Any' in field_type_name:
-                            issues.append(f"Model {name} has field '{field_name}' with Dict[Any] which may cause OpenAPI issues")
-                        
-                        # Check for nested complex types
-                        if 'typing.List[typing.Dict' in field_type_name:
-                            issues.append(f"Model {name} has field '{field_name}' with nested complex type which may cause OpenAPI issues")
-                        
-                        # Check for optional field with default None
-                        if field.default is None and not field.required:
-                            # This is usually fine, but noting it
-                            print_info(f"    Field '{field_name}' is optional with default None")
-                        
-                        # Check for circular dependencies
-                        if name.lower() in field_type_name.lower():
-                            issues.append(f"Model {name} may have circular dependency in field '{field_name}' with type {field_type_name}")
-                    
-                except Exception as e:
-                    issues.append(f"Error generating schema for model {name}: {str(e)}")
+                # Check generic types, including ones wrapped in Optional/Annotated
+                field_types = list(iter_type_args(annotation))
+                for field_type in field_types:
+                    checker = FIELD_ORIGIN_CHECKS.get(get_origin(field_type))
+                    problem = checker(get_args(field_type)) if checker else None
+                    if problem:
+                        issues.append(f"Model {name} has field '{field_name}' {problem}")
+                
+                # Check for optional field with default None
+                if field.default is None and not field.is_required():
+                    # This is usually fine, but noting it
+                    print_info(f"    Field '{field_name}' is optional with default None")
+                
+                # Check for circular dependencies
+                if any(
+                    field_type is obj
+                    or (isinstance(field_type, ForwardRef) and field_type.__forward_arg__ == name)
+                    for field_type in field_types
+                ):
+                    issues.append(f"Model {name} may have circular dependency in field '{field_name}' with type {annotation}")
         
         except Exception as e:
-            issues.append(f"Error processing file {model_file}: {str(e)}")
+            issues.append(f"Error checking fields of model {name}: {str(e)}")
     
     return issues
 
-def check_router_conflicts(app_dir: str) -> List[str]:
+def find_route_conflicts(routes: List[Any], source: str, registered: Dict[Tuple[str, str], str]) -> List[str]:
+    """
+    Register each (path, method) of the given routes, reporting ones already registered.
+    
+    registered maps (path, method) to where it was first defined and is shared across calls,
+    so conflicts between routers are found in the same single pass.
+    """
+    conflicts = []
+    
+    for route in routes:
+        path = getattr(route, "path", None)
+        if not path:
+            continue
+        
+        for method in getattr(route, "methods", None) or ():
+            key = (path, method)
+            if key in registered:
+                conflicts.append(f"Route conflict: {path} {method} defined in both {registered[key]} and {source}")
+            else:
+                registered[key] = source
+    
+    return conflicts
+
+def check_router_conflicts(app_dir: str, py_files: Optional[List[Path]] = None) -> List[str]:
     """Check for potential router conflicts"""
     issues = []
     
     print_info(f"Scanning for router conflicts in {app_dir}")
     
-    # Find all router files
-    router_files = list(Path(app_dir).glob("**/router.py")) + list(Path(app_dir).glob("**/*router*.py"))
+    # Find all router files (each file once, router.py also matches *router*)
+    if py_files is None:
+        py_files = find_python_files(app_dir)
+    router_files = [path for path in py_files if "router" in path.name]
     
     # Keep track of all routes
-    all_routes = {}  # path -> [(file, method)]
+    registered = {}  # (path, method) -> file
     
     for router_file in router_files:
         print_info(f"Checking {router_file}")
         try:
             # Load the module
-            module = load_module_from_path(str(router_file))
-            if not module:
-                issues.append(f"Failed to load module: {router_file}")
-                continue
+            module = import_module_file(router_file, app_dir)
             
             # Find all routers
             from fastapi import APIRouter
@@ -153,30 +257,11 @@ def check_router_conflicts(app_dir: str) -> List[str]:
                     print_info(f"  Found router: {name}")
                     
                     # Check router routes
-                    for route in getattr(obj, "routes", []):
-                        path = getattr(route, "path", None)
-                        methods = getattr(route, "methods", set())
-                        
-                        if path:
-                            if path not in all_routes:
-                                all_routes[path] = []
-                            
-                            for method in methods:
-                                all_routes[path].append((str(router_file), method))
+                    issues.extend(find_route_conflicts(getattr(obj, "routes", []), str(router_file), registered))
         
         except Exception as e:
             issues.append(f"Error processing router file {router_file}: {str(e)}")
     
-    # Check for conflicts
-    for path, routes in all_routes.items():
-        methods = {}  # method -> file
-        
-        for file, method in routes:
-            if method in methods:
-                issues.append(f"Route conflict: {path} {method} defined in both {methods[method]} and {file}")
-            else:
-                methods[method] = file
-    
     return issues
 
 def check_fastapi_app(main_file: str) -> List[str]:
@@ -214,8 +299,13 @@ def check_fastapi_app(main_file: str) -> List[str]:
         if not getattr(app, "version", None):
             issues.append("FastAPI app missing version")
         
-        # Check OpenAPI URL
+        # Check OpenAPI URL (the app may disable the built-in route and
+        # serve the schema from its own /openapi.json endpoint instead)
         openapi_url = getattr(app, "openapi_url", None)
+        if not openapi_url and any(
+            getattr(route, "path", None) == "/openapi.json" for route in getattr(app, "routes", [])
+        ):
+            openapi_url = "/openapi.json (custom route)"
         if not openapi_url:
             issues.append("FastAPI app missing openapi_url")
         else:
@@ -236,29 +326,12 @@ def check_fastapi_app(main_file: str) -> List[str]:
             print_info(f"  Found {len(routes)} routes")
             
             # Check for duplicates
-            paths = {}  # path -> [(method, endpoint)]
+            registered = {}  # (path, method) -> endpoint
             
             for route in routes:
-                path = getattr(route, "path", None)
-                methods = getattr(route, "methods", set())
                 endpoint = getattr(route, "endpoint", None)
-                
-                if path:
-                    if path not in paths:
-                        paths[path] = []
-                    
-                    for method in methods:
-                        paths[path].append((method, endpoint))
-            
-            # Check for conflicts
-            for path, route_methods in paths.items():
-                methods = {}  # method -> endpoint
-                
-                for method, endpoint in route_methods:
-                    if method in methods:
-                        issues.append(f"Route conflict: {path} {method} defined multiple times")
-                    else:
-                        methods[method] = endpoint
+                source = getattr(endpoint, "__qualname__", None) or getattr(route, "name", "unknown")
+                issues.extend(find_route_conflicts([route], source, registered))
         
     except Exception as e:
         issues.append(f"Error checking FastAPI app: {str(e)}")
@@ -343,6 +416,16 @@ def check_openapi_schema(app_dir: str, main_file: str) -> List[str]:
     
     return issues
 
+def run_check(check, *args) -> Tuple[str, List[str]]:
+    """Run a check with its progress output captured, so parallel checks don't interleave"""
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            issues = check(*args)
+        except Exception as e:
+            issues = [f"Error running {check.__name__}: {str(e)}"]
+    return output.getvalue(), issues
+
 def main():
     parser = argparse.ArgumentParser(description="Troubleshoot FastAPI OpenAPI schema issues")
     parser.add_argument("--app-dir", default="./app", help="Path to the app directory")
@@ -353,55 +436,47 @@ def main():
     
     print_header("FanFix API OpenAPI Schema Troubleshooter")
     
-    all_issues = []
+    # The checks are independent and mostly spend their time importing modules,
+    # so run them in separate processes (imports mutate sys.modules and hold the GIL)
+    # Walk each source tree once and share the file list between checks
+    py_files = {
+        package_dir: find_python_files(package_dir)
+        for package_dir in {args.app_dir, args.models_dir}
+    }
+    
+    checks = [
+        ("Checking Pydantic Models", check_pydantic_models, (args.models_dir, py_files[args.models_dir]),
+         "Found {} issues in Pydantic models", "No issues found in Pydantic models"),
+        ("Checking Router Conflicts", check_router_conflicts, (args.app_dir, py_files[args.app_dir]),
+         "Found {} router conflicts", "No router conflicts found"),
+        ("Checking FastAPI App", check_fastapi_app, (args.main_file,),
+         "Found {} issues in FastAPI app", "No issues found in FastAPI app"),
+        ("Checking OpenAPI Schema", check_openapi_schema, (args.app_dir, args.main_file),
+         "Found {} issues in OpenAPI schema", "Successfully generated OpenAPI schema"),
+    ]
     
-    # Check Pydantic models
-    print_header("Checking Pydantic Models")
-    model_issues = check_pydantic_models(args.models_dir)
-    all_issues.extend(model_issues)
-    
-    if model_issues:
-        print_warning(f"Found {len(model_issues)} issues in Pydantic models")
-        for issue in model_issues:
-            print_error(f"  {issue}")
-    else:
-        print_success("No issues found in Pydantic models")
-    
-    # Check router conflicts
-    print_header("Checking Router Conflicts")
-    router_issues = check_router_conflicts(args.app_dir)
-    all_issues.extend(router_issues)
-    
-    if router_issues:
-        print_warning(f"Found {len(router_issues)} router conflicts")
-        for issue in router_issues:
-            print_error(f"  {issue}")
-    else:
-        print_success("No router conflicts found")
-    
-    # Check FastAPI app
-    print_header("Checking FastAPI App")
-    app_issues = check_fastapi_app(args.main_file)
-    all_issues.extend(app_issues)
-    
-    if app_issues:
-        print_warning(f"Found {len(app_issues)} issues in FastAPI app")
-        for issue in app_issues:
-            print_error(f"  {issue}")
-    else:
-        print_success("No issues found in FastAPI app")
-    
-    # Check OpenAPI schema
-    print_header("Checking OpenAPI Schema")
-    schema_issues = check_openapi_schema(args.app_dir, args.main_file)
-    all_issues.extend(schema_issues)
+    all_issues = []
     
-    if schema_issues:
-        print_warning(f"Found {len(schema_issues)} issues in OpenAPI schema")
-        for issue in schema_issues:
-            print_error(f"  {issue}")
-    else:
-        print_success("Successfully generated OpenAPI schema")
+    with ProcessPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [
+            executor.submit(run_check, check, *check_args)
+            for _, check, check_args, _, _ in checks
+        ]
+        
+        # Report in a fixed order regardless of which check finishes first
+        for (header, _, _, found_message, ok_message), future in zip(checks, futures):
+            output, issues = future.result()
+            all_issues.extend(issues)
+            
+            print_header(header)
+            print(output, end="")
+            
+            if issues:
+                print_warning(found_message.format(len(issues)))
+                for issue in issues:
+                    print_error(f"  {issue}")
+            else:
+                print_success(ok_message)
     
     # Summary
     print_header("Summary")